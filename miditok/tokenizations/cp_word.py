@@ -9,13 +9,15 @@ from ..classes import Event, TokSequence
 from ..constants import MIDI_INSTRUMENTS, TIME_SIGNATURE
 from ..midi_tokenizer import MIDITokenizer
 
-_ADD_TOK_ATTRIBUTES = [
-    "use_programs",
-    "use_chords",
-    "use_rests",
-    "use_tempos",
-    "use_time_signatures",
-]
+# Cache of parsed TimeSig token values, which have a low cardinality
+_TS_CACHE: dict[str, tuple[int, int]] = {}
+
+
+def _parse_ts(time_sig: str) -> tuple[int, int]:
+    ts = _TS_CACHE.get(time_sig)
+    if ts is None:
+        ts = _TS_CACHE.setdefault(time_sig, tuple(map(int, time_sig.split("/"))))
+    return ts
 
 
 class CPWord(MIDITokenizer):
@@ -83,6 +85,20 @@ class CPWord(MIDITokenizer):
             type_: idx for idx, type_ in enumerate(token_types)
         }  # used for data augmentation
         self.vocab_types_idx["Bar"] = 1  # same as position
+        # Template of a compound token: the "Ignore" events are shared between the
+        # tokens created by __create_cp_token, as they are never mutated afterward.
+        # The Family slot (index 0) is replaced by a fresh Event at each call, as it
+        # carries the time of the compound token and can be altered.
+        self._cp_template = [Event(type_="Ignore", value="None") for _ in token_types]
+        # Memoized string representations of the tempo values, which are drawn
+        # from the small discrete set of self.tempos
+        self._tempo_strs = {}
+        # Token string to integer value LUT for decoding, built lazily from the
+        # vocabulary at the first _tokens_to_midi call
+        self._tok_int_val = None
+        # Frozenset view of the token types graph for O(1) membership checks,
+        # built lazily once the graph is complete (with special tokens)
+        self._frozen_types_graph = None
 
     def _add_time_events(self, events: list[Event]) -> list[list[Event]]:
         r"""Internal method intended to be implemented by inheriting classes.
@@ -92,14 +108,18 @@ class CPWord(MIDITokenizer):
         :param events: note events to complete.
         :return: the same events, with time events inserted.
         """
-        # Add time events
-        all_events = []
+        # Preallocate the compound tokens list with an estimated capacity, a cursor
+        # tracking the next slot to fill, to avoid repeated list reallocations
+        num_events = len(events)
+        all_events = [None] * (num_events * 2 + 16)
+        cursor = 0
         current_bar = -1
         bar_at_last_ts_change = 0
         previous_tick = -1
         previous_note_end = 0
         tick_at_last_ts_change = tick_at_current_bar = 0
         current_time_sig = TIME_SIGNATURE
+        current_time_sig_str = f"{current_time_sig[0]}/{current_time_sig[1]}"
         if self.config.log_tempos:
             # pick the closest to the default value
             current_tempo = float(
@@ -111,32 +131,27 @@ class CPWord(MIDITokenizer):
         ticks_per_bar = self._compute_ticks_per_bar(
             TimeSignature(0, *current_time_sig), self.time_division
         )
-        # First look for a TimeSig token, if any is given at tick 0, to update
-        # current_time_sig
-        if self.config.use_time_signatures:
+        # Look for a TimeSig and a Tempo token, if any is given at tick 0, to
+        # update current_time_sig and current_tempo, in a single pass over events
+        need_ts = self.config.use_time_signatures
+        need_tempo = self.config.use_tempos
+        if need_ts or need_tempo:
             for event in events:
-                if event.type_ == "TimeSig":
-                    current_time_sig = list(map(int, event.value.split("/")))
+                if need_ts and event.type_ == "TimeSig":
+                    current_time_sig = _parse_ts(event.value)
+                    current_time_sig_str = event.value
                     ticks_per_bar = self._compute_ticks_per_bar(
                         TimeSignature(event.time, *current_time_sig),
                         self.time_division,
                     )
-                    break
-                elif event.type_ in [
-                    "Pitch",
-                    "Velocity",
-                    "Duration",
-                    "PitchBend",
-                    "Pedal",
-                ]:
-                    break
-        # Then look for a Tempo token, if any is given at tick 0, to update
-        # current_tempo
-        if self.config.use_tempos:
-            for event in events:
-                if event.type_ == "Tempo":
+                    need_ts = False
+                    if not need_tempo:
+                        break
+                elif need_tempo and event.type_ == "Tempo":
                     current_tempo = event.value
-                    break
+                    need_tempo = False
+                    if not need_ts:
+                        break
                 elif event.type_ in [
                     "Pitch",
                     "Velocity",
@@ -145,6 +160,39 @@ class CPWord(MIDITokenizer):
                     "Pedal",
                 ]:
                     break
+        # Bind the methods called in the loop below to locals, sparing an
+        # attribute lookup and bound-method allocation per call
+        create_cp_token = self.__create_cp_token
+        ticks_to_duration_tokens = self._ticks_to_duration_tokens
+        # Precompute the absolute bar index of each event in a vectorized way, per
+        # time signature segment, sparing one Python integer division per event in
+        # the loop below.
+        times = np.fromiter(
+            (event.time for event in events), dtype=np.int64, count=len(events)
+        )
+        bar_indices = np.zeros(len(events), dtype=np.int64)
+        if self.config.use_time_signatures:
+            types = np.array([event.type_ for event in events], dtype=object)
+            ts_idx = np.flatnonzero(types == "TimeSig")
+        else:
+            ts_idx = []
+        seg_start, seg_bar, seg_tick, seg_tpb = 0, 0, 0, ticks_per_bar
+        for ts_i in ts_idx:
+            # The TimeSig event itself belongs to the previous segment, as the main
+            # loop creates its Bar tokens before updating the time signature
+            seg_end = ts_i + 1
+            bar_indices[seg_start:seg_end] = (
+                seg_bar + (times[seg_start:seg_end] - seg_tick) // seg_tpb
+            )
+            ts_time = int(times[ts_i])
+            seg_bar += (ts_time - seg_tick) // seg_tpb
+            seg_tick = ts_time
+            num, den = _parse_ts(events[ts_i].value)
+            seg_tpb = self._compute_ticks_per_bar(
+                TimeSignature(ts_time, num, den), self.time_division
+            )
+            seg_start = seg_end
+        bar_indices[seg_start:] = seg_bar + (times[seg_start:] - seg_tick) // seg_tpb
         # Add the time events
         for e, event in enumerate(events):
             if event.type_ == "Tempo":
@@ -159,18 +207,20 @@ class CPWord(MIDITokenizer):
                     and event.time - previous_note_end >= self._min_rest
                 ):
                     previous_tick = previous_note_end
-                    rest_values = self._ticks_to_duration_tokens(
+                    rest_values = ticks_to_duration_tokens(
                         event.time - previous_tick, rest=True
                     )
                     # Add Rest events and increment previous_tick
+                    rest_desc = f"{event.time - previous_tick} ticks"
                     for dur_value, dur_ticks in zip(*rest_values):
-                        all_events.append(
-                            self.__create_cp_token(
-                                previous_tick,
-                                rest=".".join(map(str, dur_value)),
-                                desc=f"{event.time - previous_tick} ticks",
-                            )
+                        if cursor == len(all_events):
+                            all_events.extend([None] * len(all_events))
+                        all_events[cursor] = create_cp_token(
+                            previous_tick,
+                            rest=".".join(map(str, dur_value)),
+                            desc=rest_desc,
                         )
+                        cursor += 1
                         previous_tick += dur_ticks
                     # We update current_bar and tick_at_current_bar here without
                     # creating Bar tokens
@@ -189,29 +239,36 @@ class CPWord(MIDITokenizer):
                         current_bar = real_current_bar
 
                 # Bar
-                num_new_bars = (
-                    bar_at_last_ts_change
-                    + (event.time - tick_at_last_ts_change) // ticks_per_bar
-                    - current_bar
-                )
+                num_new_bars = int(bar_indices[e]) - current_bar
                 if num_new_bars >= 1:
                     if self.config.use_time_signatures:
-                        time_sig_arg = f"{current_time_sig[0]}/{current_time_sig[1]}"
+                        time_sig_arg = current_time_sig_str
                     else:
                         time_sig_arg = None
+                    # Consecutive bar tokens only differ by the time carried by
+                    # their Family event: share the other events via a template
+                    bar_template = create_cp_token(
+                        0, bar=True, desc="Bar", time_signature=time_sig_arg
+                    )
                     for i in range(num_new_bars):
                         # exception when last bar and event.type == "TimeSig"
                         if i == num_new_bars - 1 and event.type_ == "TimeSig":
-                            time_sig_arg = list(map(int, event.value.split("/")))
-                            time_sig_arg = f"{time_sig_arg[0]}/{time_sig_arg[1]}"
-                        all_events.append(
-                            self.__create_cp_token(
-                                (current_bar + i + 1) * ticks_per_bar,
-                                bar=True,
-                                desc="Bar",
-                                time_signature=time_sig_arg,
+                            # TimeSig event values already carry the formatted str
+                            time_sig_arg = event.value
+                            bar_template = create_cp_token(
+                                0, bar=True, desc="Bar", time_signature=time_sig_arg
                             )
+                        cp_bar = bar_template.copy()
+                        cp_bar[0] = Event(
+                            type_="Family",
+                            value="Metric",
+                            time=(current_bar + i + 1) * ticks_per_bar,
+                            desc="Bar",
                         )
+                        if cursor == len(all_events):
+                            all_events.extend([None] * len(all_events))
+                        all_events[cursor] = cp_bar
+                        cursor += 1
                     current_bar += num_new_bars
                     tick_at_current_bar = (
                         tick_at_last_ts_change
@@ -221,21 +278,23 @@ class CPWord(MIDITokenizer):
                 # Position
                 if event.type_ != "TimeSig":
                     pos_index = event.time - tick_at_current_bar
-                    all_events.append(
-                        self.__create_cp_token(
-                            event.time,
-                            pos=pos_index,
-                            chord=event.value if event.type_ == "Chord" else None,
-                            tempo=current_tempo if self.config.use_tempos else None,
-                            desc="Position",
-                        )
+                    if cursor == len(all_events):
+                        all_events.extend([None] * len(all_events))
+                    all_events[cursor] = create_cp_token(
+                        event.time,
+                        pos=pos_index,
+                        chord=event.value if event.type_ == "Chord" else None,
+                        tempo=current_tempo if self.config.use_tempos else None,
+                        desc="Position",
                     )
+                    cursor += 1
 
                 previous_tick = event.time
 
             # Update time signature time variables, after adjusting the time (above)
             if event.type_ == "TimeSig":
-                current_time_sig = list(map(int, event.value.split("/")))
+                current_time_sig = _parse_ts(event.value)
+                current_time_sig_str = event.value
                 bar_at_last_ts_change += (
                     event.time - tick_at_last_ts_change
                 ) // ticks_per_bar
@@ -249,16 +308,17 @@ class CPWord(MIDITokenizer):
 
             # Convert event to CP Event
             # Update max offset time of the notes encountered
-            if event.type_ == "Pitch" and e + 2 < len(events):
-                all_events.append(
-                    self.__create_cp_token(
-                        event.time,
-                        pitch=event.value,
-                        vel=events[e + 1].value,
-                        dur=events[e + 2].value,
-                        program=current_program,
-                    )
+            if event.type_ == "Pitch" and e + 2 < num_events:
+                if cursor == len(all_events):
+                    all_events.extend([None] * len(all_events))
+                all_events[cursor] = create_cp_token(
+                    event.time,
+                    pitch=event.value,
+                    vel=events[e + 1].value,
+                    dur=events[e + 2].value,
+                    program=current_program,
                 )
+                cursor += 1
                 previous_note_end = max(previous_note_end, event.desc)
             elif event.type_ in [
                 "Program",
@@ -268,7 +328,7 @@ class CPWord(MIDITokenizer):
             ]:
                 previous_note_end = max(previous_note_end, event.time)
 
-        return all_events
+        return all_events[:cursor]
 
     def __create_cp_token(
         self,
@@ -317,46 +377,41 @@ class CPWord(MIDITokenizer):
         :return: The compound token as a list of integers
         """
 
-        def create_event(type_: str, value: str | int) -> Event:
-            return Event(type_=type_, value=value, time=time, desc=desc)
-
-        cp_token = [
-            Event(type_="Family", value="Metric", time=time, desc=desc),
-            Event(type_="Ignore", value="None", time=time, desc=desc),
-            Event(type_="Ignore", value="None", time=time, desc=desc),
-            Event(type_="Ignore", value="None", time=time, desc=desc),
-            Event(type_="Ignore", value="None", time=time, desc=desc),
-        ]
-        cp_token += [
-            create_event("Ignore", "None")
-            for add_tok_attr in _ADD_TOK_ATTRIBUTES
-            if getattr(self.config, add_tok_attr)
-        ]
+        vocab_types_idx = self.vocab_types_idx
+        cp_token = self._cp_template.copy()
+        cp_token[0] = Event(type_="Family", value="Metric", time=time, desc=desc)
 
         if bar:
-            cp_token[1] = create_event("Bar", "None")
+            cp_token[1] = Event(type_="Bar", value="None", time=time, desc=desc)
             if time_signature is not None:
-                cp_token[self.vocab_types_idx["TimeSig"]] = create_event(
-                    "TimeSig", time_signature
+                cp_token[vocab_types_idx["TimeSig"]] = Event(
+                    type_="TimeSig", value=time_signature, time=time, desc=desc
                 )
         elif pos is not None:
-            cp_token[1] = create_event("Position", pos)
+            cp_token[1] = Event(type_="Position", value=pos, time=time, desc=desc)
             if chord is not None:
-                cp_token[self.vocab_types_idx["Chord"]] = create_event("Chord", chord)
+                cp_token[vocab_types_idx["Chord"]] = Event(
+                    type_="Chord", value=chord, time=time, desc=desc
+                )
             if tempo is not None:
-                cp_token[self.vocab_types_idx["Tempo"]] = create_event(
-                    "Tempo", str(tempo)
+                tempo_str = self._tempo_strs.get(tempo)
+                if tempo_str is None:
+                    tempo_str = self._tempo_strs[tempo] = str(tempo)
+                cp_token[vocab_types_idx["Tempo"]] = Event(
+                    type_="Tempo", value=tempo_str, time=time, desc=desc
                 )
         elif rest is not None:
-            cp_token[self.vocab_types_idx["Rest"]] = create_event("Rest", rest)
+            cp_token[vocab_types_idx["Rest"]] = Event(
+                type_="Rest", value=rest, time=time, desc=desc
+            )
         elif pitch is not None:
             cp_token[0].value = "Note"
-            cp_token[2] = create_event("Pitch", pitch)
-            cp_token[3] = create_event("Velocity", vel)
-            cp_token[4] = create_event("Duration", dur)
+            cp_token[2] = Event(type_="Pitch", value=pitch, time=time, desc=desc)
+            cp_token[3] = Event(type_="Velocity", value=vel, time=time, desc=desc)
+            cp_token[4] = Event(type_="Duration", value=dur, time=time, desc=desc)
             if program is not None:
-                cp_token[self.vocab_types_idx["Program"]] = create_event(
-                    "Program", program
+                cp_token[vocab_types_idx["Program"]] = Event(
+                    type_="Program", value=program, time=time, desc=desc
                 )
 
         return cp_token
@@ -391,12 +446,30 @@ class CPWord(MIDITokenizer):
                 f"{max(self.config.beat_res.values())}"
             )
         ticks_per_sample = time_division // max(self.config.beat_res.values())
+        # Pre-convert the Duration and Rest token values into ticks, so that the
+        # decode loop below performs a single dict lookup per token instead of
+        # parsing the value strings
+        dur_to_ticks = {
+            ".".join(map(str, dur)): self._token_duration_to_ticks(dur, time_division)
+            for dur in self.durations
+        }
+        if self.config.use_rests:
+            rest_to_ticks = {
+                ".".join(map(str, rest)): self._token_duration_to_ticks(
+                    rest, time_division
+                )
+                for rest in self.rests
+            }
 
         # RESULTS
+        # Notes are accumulated in Python lists and assigned to the tracks in
+        # bulk at the end, one FFI crossing per track instead of one per note
+        # Tempo and time signature changes are accumulated as plain tuples and
+        # only converted into symusic objects at the end
         tracks: dict[int, Track] = {}
-        tempo_changes = [Tempo(-1, self.default_tempo)]
+        tracks_notes: dict[int, list[Note]] = {}
+        tempo_changes = [(-1, -1.0)]  # mock
         time_signature_changes = []
-        tempo_changes[0].tempo = -1
 
         def check_inst(prog: int) -> None:
             if prog not in tracks:
@@ -405,6 +478,7 @@ class CPWord(MIDITokenizer):
                     is_drum=prog == -1,
                     name="Drums" if prog == -1 else MIDI_INSTRUMENTS[prog]["name"],
                 )
+                tracks_notes[prog] = []
 
         current_tick = tick_at_last_ts_change = tick_at_current_bar = 0
         current_bar = -1
@@ -412,30 +486,46 @@ class CPWord(MIDITokenizer):
         current_program = 0
         current_instrument = None
         previous_note_end = 0
+        # Bind config flags and vocabulary indices to locals for the decode loop
+        use_programs = self.config.use_programs
+        use_time_signatures = self.config.use_time_signatures
+        use_tempos = self.config.use_tempos
+        use_rests = self.config.use_rests
+        ts_idx = self.vocab_types_idx["TimeSig"] if use_time_signatures else -1
+        tempo_idx = self.vocab_types_idx["Tempo"] if use_tempos else -1
+        rest_idx = self.vocab_types_idx["Rest"] if use_rests else -1
+        one_token_stream = self.one_token_stream
+        if self._tok_int_val is None:
+            self._tok_int_val = {
+                token: int(token.partition("_")[2])
+                for vocab_column in self.vocab
+                for token in vocab_column
+                if token.partition("_")[0]
+                in ("Pitch", "Velocity", "Position", "Program")
+            }
+        tok_int_val = self._tok_int_val
         for si, seq in enumerate(tokens):
             # First look for the first time signature if needed
             if si == 0:
-                if self.config.use_time_signatures:
+                if use_time_signatures:
                     for compound_token in seq:
-                        token_family = compound_token[0].split("_")[1]
+                        token_family = compound_token[0].partition("_")[2]
                         if token_family == "Metric":
-                            bar_pos = compound_token[1].split("_")[0]
+                            bar_pos = compound_token[1].partition("_")[0]
                             if bar_pos == "Bar":
                                 num, den = self._parse_token_time_signature(
-                                    compound_token[
-                                        self.vocab_types_idx["TimeSig"]
-                                    ].split("_")[1]
-                                )
-                                time_signature_changes.append(
-                                    TimeSignature(0, num, den)
+                                    compound_token[ts_idx].partition("_")[2]
                                 )
+                                time_signature_changes.append((0, num, den))
                                 break
                         else:
                             break
                 if len(time_signature_changes) == 0:
-                    time_signature_changes.append(TimeSignature(0, *TIME_SIGNATURE))
-            current_time_sig = time_signature_changes[0]
-            ticks_per_bar = self._compute_ticks_per_bar(current_time_sig, time_division)
+                    time_signature_changes.append((0, *TIME_SIGNATURE))
+            _, current_ts_num, current_ts_den = time_signature_changes[0]
+            ticks_per_bar = self._compute_ticks_per_bar(
+                TimeSignature(*time_signature_changes[0]), time_division
+            )
             # Set track / sequence program if needed
             if not self.one_token_stream:
                 current_tick = tick_at_last_ts_change = tick_at_current_bar = 0
@@ -452,57 +542,63 @@ class CPWord(MIDITokenizer):
                     if current_program == -1
                     else MIDI_INSTRUMENTS[current_program]["name"],
                 )
+                current_instrument_notes = []
 
-            # Decode tokens
+            # Decode tokens. Tempos and time signatures are only decoded from the
+            # first sequence: resolve these checks per sequence, not per token
+            first_seq = si == 0
+            decode_tempos = use_tempos and first_seq
             for compound_token in seq:
-                token_family = compound_token[0].split("_")[1]
+                # Partition each token of the compound token only once;
+                # str.partition does not allocate an intermediate list as split does
+                parts = [tok.partition("_") for tok in compound_token]
+                token_family = parts[0][2]
                 if token_family == "Note":
-                    pad_range_idx = 6 if self.config.use_programs else 5
-                    if any(
-                        tok.split("_")[1] == "None"
-                        for tok in compound_token[2:pad_range_idx]
+                    # Unrolled validity check, sparing a generator and a list
+                    # slice per note
+                    if (
+                        parts[2][2] == "None"
+                        or parts[3][2] == "None"
+                        or parts[4][2] == "None"
+                        or (use_programs and parts[5][2] == "None")
                     ):
                         continue
-                    pitch = int(compound_token[2].split("_")[1])
-                    vel = int(compound_token[3].split("_")[1])
-                    duration = self._token_duration_to_ticks(
-                        compound_token[4].split("_")[1], time_division
-                    )
-                    if self.config.use_programs:
-                        current_program = int(compound_token[5].split("_")[1])
+                    pitch = tok_int_val[compound_token[2]]
+                    vel = tok_int_val[compound_token[3]]
+                    duration = dur_to_ticks[parts[4][2]]
+                    if use_programs:
+                        current_program = tok_int_val[compound_token[5]]
                     new_note = Note(current_tick, duration, pitch, vel)
-                    if self.one_token_stream:
+                    if one_token_stream:
                         check_inst(current_program)
-                        tracks[current_program].notes.append(new_note)
+                        tracks_notes[current_program].append(new_note)
                     else:
-                        current_instrument.notes.append(new_note)
+                        current_instrument_notes.append(new_note)
                     previous_note_end = max(previous_note_end, current_tick + duration)
 
                 elif token_family == "Metric":
-                    bar_pos = compound_token[1].split("_")[0]
+                    bar_pos = parts[1][0]
                     if bar_pos == "Bar":
                         current_bar += 1
                         if current_bar > 0:
                             current_tick = tick_at_current_bar + ticks_per_bar
                         tick_at_current_bar = current_tick
                         # Add new TS only if different from the last one
-                        if self.config.use_time_signatures:
+                        if use_time_signatures:
                             num, den = self._parse_token_time_signature(
-                                compound_token[self.vocab_types_idx["TimeSig"]].split(
-                                    "_"
-                                )[1]
+                                parts[ts_idx][2]
                             )
-                            if (
-                                num != current_time_sig.numerator
-                                or den != current_time_sig.denominator
-                            ):
-                                current_time_sig = TimeSignature(current_tick, num, den)
-                                if si == 0:
-                                    time_signature_changes.append(current_time_sig)
+                            if num != current_ts_num or den != current_ts_den:
+                                current_ts_num, current_ts_den = num, den
+                                if first_seq:
+                                    time_signature_changes.append(
+                                        (current_tick, num, den)
+                                    )
                                 tick_at_last_ts_change = tick_at_current_bar
                                 bar_at_last_ts_change = current_bar
                                 ticks_per_bar = self._compute_ticks_per_bar(
-                                    current_time_sig, time_division
+                                    TimeSignature(current_tick, num, den),
+                                    time_division,
                                 )
                     elif bar_pos == "Position":  # i.e. its a position
                         if current_bar == -1:
@@ -510,30 +606,20 @@ class CPWord(MIDITokenizer):
                             current_bar = 0
                         current_tick = (
                             tick_at_current_bar
-                            + int(compound_token[1].split("_")[1]) * ticks_per_sample
+                            + tok_int_val[compound_token[1]] * ticks_per_sample
                         )
                         # Add new tempo change only if different from the last one
-                        if self.config.use_tempos and si == 0:
-                            tempo = float(
-                                compound_token[self.vocab_types_idx["Tempo"]].split(
-                                    "_"
-                                )[1]
-                            )
+                        if decode_tempos:
+                            tempo = float(parts[tempo_idx][2])
+                            last_tempo_tick, last_tempo = tempo_changes[-1]
                             if (
-                                tempo != round(tempo_changes[-1].tempo, 2)
-                                and current_tick != tempo_changes[-1].time
+                                tempo != round(last_tempo, 2)
+                                and current_tick != last_tempo_tick
                             ):
-                                tempo_changes.append(Tempo(current_tick, tempo))
-                    elif (
-                        self.config.use_rests
-                        and compound_token[self.vocab_types_idx["Rest"]].split("_")[1]
-                        != "None"
-                    ):
+                                tempo_changes.append((current_tick, tempo))
+                    elif use_rests and parts[rest_idx][2] != "None":
                         current_tick = max(previous_note_end, current_tick)
-                        current_tick += self._token_duration_to_ticks(
-                            compound_token[self.vocab_types_idx["Rest"]].split("_")[1],
-                            time_division,
-                        )
+                        current_tick += rest_to_ticks[parts[rest_idx][2]]
                         real_current_bar = (
                             bar_at_last_ts_change
                             + (current_tick - tick_at_last_ts_change) // ticks_per_bar
@@ -552,24 +638,29 @@ class CPWord(MIDITokenizer):
 
             # Add current_inst to midi and handle notes still active
             if not self.one_token_stream:
+                current_instrument.notes = current_instrument_notes
                 midi.tracks.append(current_instrument)
 
         # Delete mocked
         # And handle first tempo (tick 0) here instead of super
         del tempo_changes[0]
         if len(tempo_changes) == 0 or (
-            tempo_changes[0].time != 0
-            and round(tempo_changes[0].tempo, 2) != self.default_tempo
+            tempo_changes[0][0] != 0
+            and round(tempo_changes[0][1], 2) != self.default_tempo
         ):
-            tempo_changes.insert(0, Tempo(0, self.default_tempo))
-        elif round(tempo_changes[0].tempo, 2) == self.default_tempo:
-            tempo_changes[0].time = 0
+            tempo_changes.insert(0, (0, self.default_tempo))
+        elif round(tempo_changes[0][1], 2) == self.default_tempo:
+            tempo_changes[0] = (0, tempo_changes[0][1])
 
         # create MidiFile
         if self.one_token_stream:
+            for prog, track in tracks.items():
+                track.notes = tracks_notes[prog]
             midi.tracks = list(tracks.values())
-        midi.tempos = tempo_changes
-        midi.time_signatures = time_signature_changes
+        midi.tempos = [Tempo(tick, tempo) for tick, tempo in tempo_changes]
+        midi.time_signatures = [
+            TimeSignature(*time_sig) for time_sig in time_signature_changes
+        ]
 
         return midi
 
@@ -590,32 +681,34 @@ class CPWord(MIDITokenizer):
         vocab[0].append("Family_Note")
 
         # POSITION
-        max_num_beats = max(ts[0] for ts in self.time_signatures)
-        num_positions = max(self.config.beat_res.values()) * max_num_beats
+        # Cached as attributes, as they can be reused by other methods
+        self._ts_array = np.array(self.time_signatures, dtype=np.int16)
+        self._max_num_beats = int(self._ts_array[:, 0].max())
+        num_positions = max(self.config.beat_res.values()) * self._max_num_beats
         vocab[1].append("Ignore_None")
         vocab[1].append("Bar_None")
-        vocab[1] += [f"Position_{i}" for i in range(num_positions)]
+        vocab[1] += list(map("Position_{}".format, range(num_positions)))
 
         # PITCH
         vocab[2].append("Ignore_None")
-        vocab[2] += [f"Pitch_{i}" for i in range(*self.config.pitch_range)]
+        vocab[2] += list(map("Pitch_{}".format, range(*self.config.pitch_range)))
 
         # VELOCITY
         vocab[3].append("Ignore_None")
-        vocab[3] += [f"Velocity_{i}" for i in self.velocities]
+        vocab[3] += list(map("Velocity_{}".format, self.velocities))
 
         # DURATION
         vocab[4].append("Ignore_None")
-        vocab[4] += [
-            f'Duration_{".".join(map(str, duration))}' for duration in self.durations
-        ]
+        vocab[4] += list(
+            map(
+                "Duration_{}".format,
+                (".".join(map(str, duration)) for duration in self.durations),
+            )
+        )
 
         # PROGRAM
         if self.config.use_programs:
-            vocab += [
-                ["Ignore_None"]
-                + [f"Program_{program}" for program in self.config.programs]
-            ]
+            vocab += [["Ignore_None", *map("Program_{}".format, self.config.programs)]]
 
         # CHORD
         if self.config.use_chords:
@@ -624,19 +717,26 @@ class CPWord(MIDITokenizer):
         # REST
         if self.config.use_rests:
             vocab += [
-                ["Ignore_None"]
-                + [f'Rest_{".".join(map(str, rest))}' for rest in self.rests]
+                [
+                    "Ignore_None",
+                    *map(
+                        "Rest_{}".format,
+                        (".".join(map(str, rest)) for rest in self.rests),
+                    ),
+                ]
             ]
 
         # TEMPO
         if self.config.use_tempos:
-            vocab += [["Ignore_None"] + [f"Tempo_{i}" for i in self.tempos]]
+            vocab += [["Ignore_None", *map("Tempo_{}".format, self.tempos)]]
 
         # TIME_SIGNATURE
         if self.config.use_time_signatures:
             vocab += [
-                ["Ignore_None"]
-                + [f"TimeSig_{i[0]}/{i[1]}" for i in self.time_signatures]
+                [
+                    "Ignore_None",
+                    *map("TimeSig_{0[0]}/{0[1]}".format, self.time_signatures),
+                ]
             ]
 
         return vocab
@@ -653,6 +753,16 @@ class CPWord(MIDITokenizer):
 
         :return: the token types transitions dictionary
         """
+        # Memoized on the config flags it depends on, as the graph is mutated
+        # afterward (special tokens) a copy with fresh lists is returned
+        key = (
+            self.config.use_chords,
+            self.config.use_rests,
+            self.config.use_tempos,
+        )
+        cached = getattr(self, "_types_graph_cache", None)
+        if cached is not None and cached[0] == key:
+            return {type_: list(succ) for type_, succ in cached[1].items()}
         dic = {
             "Bar": ["Position", "Bar"],
             "Position": ["Pitch"],
@@ -674,10 +784,14 @@ class CPWord(MIDITokenizer):
                 dic["Position"].append("Rest")
                 dic["Rest"].append("Position")
 
-        for key in dic:
-            dic[key].append("Ignore")
+        for token_type in dic:
+            dic[token_type].append("Ignore")
         dic["Ignore"] = list(dic.keys())
 
+        self._types_graph_cache = (
+            key,
+            {type_: tuple(succ) for type_, succ in dic.items()},
+        )
         return dic
 
     def _tokens_errors(self, tokens: list[list[str]]) -> int:
@@ -695,51 +809,75 @@ class CPWord(MIDITokenizer):
         :return: the number of errors predicted (no more than one per token).
         """
 
-        def cp_token_type(tok: list[str]) -> list[str]:
-            family = tok[0].split("_")[1]
-            if family == "Note":
-                return tok[2].split("_")
-            elif family == "Metric":
-                bar_pos = tok[1].split("_")
-                if bar_pos[0] in ["Bar", "Position"]:
-                    return bar_pos
-                else:  # additional token
-                    for i in range(1, 5):
-                        decoded_token = tok[-i].split("_")
-                        if decoded_token[0] != "Ignore":
-                            return decoded_token
-                raise RuntimeError("No token type found, unknown error")
-            elif family == "None":
-                return ["PAD", "None"]
-            else:  # Program
+        def cp_token_type(tok: list[str]) -> tuple[str, str]:
+            # Dispatch on the family token directly, only splitting the
+            # subtokens the matched path actually needs
+            family_tok = tok[0]
+            if family_tok == "Family_Note":
+                token_type, _, token_value = tok[2].partition("_")
+                return token_type, token_value
+            if family_tok == "Family_Metric":
+                token_type, _, token_value = tok[1].partition("_")
+                if token_type in ("Bar", "Position"):
+                    return token_type, token_value
+                # additional token
+                for i in range(1, 5):
+                    token_type, _, token_value = tok[-i].partition("_")
+                    if token_type != "Ignore":
+                        return token_type, token_value
                 raise RuntimeError("No token type found, unknown error")
+            if family_tok.rpartition("_")[2] == "None":
+                return "PAD", "None"
+            # Program
+            raise RuntimeError("No token type found, unknown error")
 
         err = 0
         previous_type = cp_token_type(tokens[0])[0]
         current_pos = -1
         program = 0
-        current_pitches = {p: [] for p in self.config.programs}
-
-        for token in tokens[1:]:
-            token_type, token_value = cp_token_type(token)
-            # Good token type
-            if token_type in self.tokens_types_graph[previous_type]:
-                if token_type == "Bar":
-                    current_pos = -1
-                    current_pitches = {p: [] for p in self.config.programs}
-                elif self.config.remove_duplicated_notes and token_type == "Pitch":
-                    if self.config.use_programs:
-                        program = int(self[5, token[5]].split("_")[1])
-                    if int(token_value) in current_pitches[program]:
+        program_cache = {}
+        # Bind the attributes used at each iteration to locals
+        if self._frozen_types_graph is None:
+            self._frozen_types_graph = {
+                type_: frozenset(succ)
+                for type_, succ in self.tokens_types_graph.items()
+            }
+        tokens_types_graph = self._frozen_types_graph
+        remove_duplicated_notes = self.config.remove_duplicated_notes
+        use_programs = self.config.use_programs
+        # One pitch bitset per program, built once and zeroed in place on
+        # Bar/Position resets instead of rebuilding a dict per reset
+        current_pitches = dict.fromkeys(self.config.programs, 0)
+
+        for compound_token in tokens[1:]:
+            token_type, token_value = cp_token_type(compound_token)
+            # Good token type, most frequent types checked first
+            if token_type in tokens_types_graph.get(previous_type, ()):
+                if remove_duplicated_notes and token_type == "Pitch":
+                    if use_programs:
+                        prog_tok = compound_token[5]
+                        program = program_cache.get(prog_tok)
+                        if program is None:
+                            program = program_cache[prog_tok] = int(
+                                prog_tok.rpartition("_")[2]
+                            )
+                    pitch_bit = 1 << int(token_value)
+                    if current_pitches[program] & pitch_bit:
                         err += 1  # pitch already played at current position
                     else:
-                        current_pitches[program].append(int(token_value))
+                        current_pitches[program] |= pitch_bit
                 elif token_type == "Position":
-                    if int(token_value) <= current_pos and previous_type != "Rest":
+                    pos_value = int(token_value)
+                    if pos_value <= current_pos and previous_type != "Rest":
                         err += 1  # token position value <= to the current position
                     else:
-                        current_pos = int(token_value)
-                        current_pitches = {p: [] for p in self.config.programs}
+                        current_pos = pos_value
+                        for program_key in current_pitches:
+                            current_pitches[program_key] = 0
+                elif token_type == "Bar":
+                    current_pos = -1
+                    for program_key in current_pitches:
+                        current_pitches[program_key] = 0
             # Bad token type
             else:
                 err += 1
@@ -12,6 +12,7 @@ from ..constants import (
 )
 from ..midi_tokenizer import MIDITokenizer
 from ..utils import detect_chords, get_midi_max_tick
+from ..utils.utils import np_get_closest
 
 
 class MuMIDI(MIDITokenizer):
@@ -77,6 +78,16 @@ class MuMIDI(MIDITokenizer):
             self.vocab_types_idx["Rest"] = 0
         if self.config.use_tempos:
             self.vocab_types_idx["Tempo"] = -3
+        # Frozenset view of the token types graph for O(1) membership checks,
+        # built lazily once the graph is complete (with special tokens)
+        self._frozen_types_graph = None
+        # Midpoints between successive duration tick values, built lazily as
+        # self._durations_ticks does not exist yet at this point
+        self._duration_midpoints = None
+        # Precomputed positional-encoding token strings, extended on demand
+        # during tokenization so identical strings are allocated only once
+        self._barposenc_strs = []
+        self._posposenc_strs = []
 
     def _midi_to_tokens(self, midi: Score) -> TokSequence:
         r"""Tokenize a MIDI file.
@@ -106,80 +117,125 @@ class MuMIDI(MIDITokenizer):
             if track.program in self.config.programs:
                 note_tokens += self._track_to_tokens(track, midi.ticks_per_quarter)
 
-        note_tokens.sort(
-            key=lambda x: (x[0].time, x[0].desc)
-        )  # Sort by time then track
+        # Sort by time then track, sorting precomputed key tuples rather than
+        # calling a key lambda (and two attribute lookups) per comparison
+        sort_keys = [
+            (note_token[0].time, note_token[0].desc, i)
+            for i, note_token in enumerate(note_tokens)
+        ]
+        sort_keys.sort()
+        note_tokens = [note_tokens[key[2]] for key in sort_keys]
 
         ticks_per_sample = midi.ticks_per_quarter / max(self.config.beat_res.values())
         ticks_per_bar = midi.ticks_per_quarter * 4
+        # Compute the bar and position of every note token at once
+        times = np.fromiter(
+            (note_token[0].time for note_token in note_tokens),
+            dtype=np.int64,
+            count=len(note_tokens),
+        )
+        bars = times // ticks_per_bar
+        positions = ((times % ticks_per_bar) / ticks_per_sample).astype(np.int64)
+        # (Tempo) precompute the tempo in effect at each note token. The MIDI
+        # tempos were snapped to self.tempos during preprocessing, so mapping
+        # them back to the grid avoids a round() call per change
+        if self.config.use_tempos:
+            tempo_values = np_get_closest(
+                self.tempos,
+                np.fromiter(
+                    (tempo.tempo for tempo in midi.tempos),
+                    dtype=np.float64,
+                    count=len(midi.tempos),
+                ),
+            )
+            tempo_strs = [f"Tempo_{tempo}" for tempo in tempo_values]
+            tempo_times = np.fromiter(
+                (tempo.time for tempo in midi.tempos),
+                dtype=np.int64,
+                count=len(midi.tempos),
+            )
+            tempo_idxs = np.maximum(
+                np.searchsorted(tempo_times, times, side="right") - 1, 0
+            )
+        # Extend the positional-encoding string tables if needed and bind them
+        # to locals, so the loop below reuses string objects instead of
+        # rebuilding the same f-strings for every note
+        max_bar = int(bars[-1]) if len(bars) > 0 else 0
+        if len(self._barposenc_strs) <= max_bar:
+            self._barposenc_strs += [
+                f"BarPosEnc_{i}" for i in range(len(self._barposenc_strs), max_bar + 1)
+            ]
+        barposenc_strs = self._barposenc_strs
+        max_pos = int(positions.max()) if len(positions) > 0 else 0
+        if len(self._posposenc_strs) <= max_pos:
+            self._posposenc_strs += [
+                f"PositionPosEnc_{i}"
+                for i in range(len(self._posposenc_strs), max_pos + 1)
+            ]
+        posposenc_strs = self._posposenc_strs
         tokens = []
 
         current_tick = -1
         current_bar = -1
         current_pos = -1
         current_track = -2  # because -2 doesn't exist
-        current_tempo_idx = 0
-        current_tempo = round(midi.tempos[current_tempo_idx].tempo, 2)
-        for note_token in note_tokens:
-            # (Tempo) update tempo values current_tempo
-            # If the current tempo is not the last one
-            if self.config.use_tempos and current_tempo_idx + 1 < len(midi.tempos):
-                # Will loop over incoming tempo changes
-                for tempo_change in midi.tempos[current_tempo_idx + 1 :]:
-                    # If this tempo change happened before the current moment
-                    if tempo_change.time <= note_token[0].time:
-                        current_tempo = round(tempo_change.tempo, 2)
-                        current_tempo_idx += (
-                            1  # update tempo value (might not change) and index
-                        )
-                    elif tempo_change.time > note_token[0].time:
-                        break  # this tempo change is beyond the current time step
+        current_tempo_str = f"Tempo_{round(midi.tempos[0].tempo, 2)}"
+        for ei, note_token in enumerate(note_tokens):
+            # (Tempo) update current_tempo_str
+            if self.config.use_tempos:
+                current_tempo_str = tempo_strs[tempo_idxs[ei]]
             # Positions and bars pos enc
             if note_token[0].time != current_tick:
-                pos_index = int((note_token[0].time % ticks_per_bar) / ticks_per_sample)
                 current_tick = note_token[0].time
-                current_pos = pos_index
+                current_pos = int(positions[ei])
                 current_track = -2  # reset
                 # (New bar)
-                if current_bar < current_tick // ticks_per_bar:
-                    num_new_bars = current_tick // ticks_per_bar - current_bar
+                if current_bar < bars[ei]:
+                    num_new_bars = int(bars[ei]) - current_bar
                     for i in range(num_new_bars):
                         bar_token = [
                             "Bar_None",
-                            f"BarPosEnc_{current_bar + i + 1}",
+                            barposenc_strs[current_bar + i + 1],
                             "PositionPosEnc_None",
                         ]
                         if self.config.use_tempos:
-                            bar_token.append(f"Tempo_{current_tempo}")
+                            bar_token.append(current_tempo_str)
                         tokens.append(bar_token)
                     current_bar += num_new_bars
                 # Position
                 pos_token = [
                     f"Position_{current_pos}",
-                    f"BarPosEnc_{current_bar}",
-                    f"PositionPosEnc_{current_pos}",
+                    barposenc_strs[current_bar],
+                    posposenc_strs[current_pos],
                 ]
                 if self.config.use_tempos:
-                    pos_token.append(f"Tempo_{current_tempo}")
+                    pos_token.append(current_tempo_str)
                 tokens.append(pos_token)
             # Program (track)
             if note_token[0].desc != current_track:
                 current_track = note_token[0].desc
                 track_token = [
                     f"Program_{current_track}",
-                    f"BarPosEnc_{current_bar}",
-                    f"PositionPosEnc_{current_pos}",
+                    barposenc_strs[current_bar],
+                    posposenc_strs[current_pos],
                 ]
                 if self.config.use_tempos:
-                    track_token.append(f"Tempo_{current_tempo}")
+                    track_token.append(current_tempo_str)
                 tokens.append(track_token)
 
             # Adding bar and position tokens to notes for positional encoding
             note_token[0] = str(note_token[0])
-            note_token.insert(1, f"BarPosEnc_{current_bar}")
-            note_token.insert(2, f"PositionPosEnc_{current_pos}")
             if self.config.use_tempos:
-                note_token.insert(3, f"Tempo_{current_tempo}")
+                note_token[1:1] = (
+                    barposenc_strs[current_bar],
+                    posposenc_strs[current_pos],
+                    current_tempo_str,
+                )
+            else:
+                note_token[1:1] = (
+                    barposenc_strs[current_bar],
+                    posposenc_strs[current_pos],
+                )
             tokens.append(note_token)
 
         tokens = TokSequence(tokens=tokens)
@@ -202,11 +258,22 @@ class MuMIDI(MIDITokenizer):
         # Make sure the notes are sorted first by their onset (start) times, second by
         # pitch: notes.sort(key=lambda x: (x.start, x.pitch)) (done in midi_to_tokens)
 
+        # Compute the duration bin of each note in one batched binary search,
+        # instead of a full argmin over the duration values per note
+        if self._duration_midpoints is None:
+            self._duration_midpoints = (
+                self._durations_ticks[:-1] + self._durations_ticks[1:]
+            ) / 2
+        durations = np.fromiter(
+            (note.end - note.start for note in track.notes),
+            dtype=np.int64,
+            count=len(track.notes),
+        )
+        dur_idxs = np.searchsorted(self._duration_midpoints, durations)
+
         tokens = []
-        for note in track.notes:
+        for note, dur_idx in zip(track.notes, dur_idxs):
             # Note
-            duration = note.end - note.start
-            dur_idx = np.argmin(np.abs(self._durations_ticks - duration))
             if not track.is_drum:
                 tokens.append(
                     [
@@ -293,7 +360,7 @@ class MuMIDI(MIDITokenizer):
 
         # Tempos
         if self.config.use_tempos and len(tokens) > 0:
-            first_tempo = float(tokens.tokens[0][3].split("_")[1])
+            first_tempo = float(tokens.tokens[0][3].rpartition("_")[2])
         else:
             first_tempo = self.default_tempo
         midi.tempos.append(Tempo(0, first_tempo))
@@ -303,8 +370,11 @@ class MuMIDI(MIDITokenizer):
         current_tick = 0
         current_bar = -1
         current_track = 0  # default set to piano
+        note_append = None  # bound to the current track's note list
+        use_tempos = self.config.use_tempos
+        last_tempo_str = None
         for time_step in tokens.tokens:
-            tok_type, tok_val = time_step[0].split("_")
+            tok_type, _, tok_val = time_step[0].partition("_")
             if tok_type == "Bar":
                 current_bar += 1
                 current_tick = current_bar * time_division * 4
@@ -318,25 +388,27 @@ class MuMIDI(MIDITokenizer):
                 )
             elif tok_type == "Program":
                 current_track = tok_val
-                try:
-                    _ = tracks[current_track]
-                except KeyError:
-                    tracks[current_track] = []
+                note_append = tracks.setdefault(current_track, []).append
             elif tok_type == "Pitch" or tok_type == "DrumPitch":
-                vel, duration = (time_step[i].split("_")[1] for i in (-2, -1))
+                vel = time_step[-2].rpartition("_")[2]
+                duration = time_step[-1].rpartition("_")[2]
                 if any(val == "None" for val in (vel, duration)):
                     continue
                 pitch = int(tok_val)
                 vel = int(vel)
                 duration = self._token_duration_to_ticks(duration, time_division)
 
-                tracks[current_track].append(Note(current_tick, duration, pitch, vel))
+                note_append(Note(current_tick, duration, pitch, vel))
 
-            # Decode tempo if required
-            if self.config.use_tempos:
-                tempo_val = float(time_step[3].split("_")[1])
-                if tempo_val != midi.tempos[-1].tempo:
-                    midi.tempos.append(Tempo(current_tick, tempo_val))
+            # Decode tempo if required, only parsing the token when its
+            # string differs from the last one seen
+            if use_tempos:
+                tempo_str = time_step[3]
+                if tempo_str != last_tempo_str:
+                    tempo_val = float(tempo_str.rpartition("_")[2])
+                    if tempo_val != midi.tempos[-1].tempo:
+                        midi.tempos.append(Tempo(current_tick, tempo_val))
+                    last_tempo_str = tempo_str
 
         # Appends created notes to MIDI object
         for program, notes in tracks.items():
@@ -376,28 +448,32 @@ class MuMIDI(MIDITokenizer):
         vocab = [[] for _ in range(3)]
 
         # PITCH & DRUM PITCHES & BAR & POSITIONS & PROGRAM
-        vocab[0] += [f"Pitch_{i}" for i in range(*self.config.pitch_range)]
-        vocab[0] += [
-            f"DrumPitch_{i}"
-            for i in range(*self.config.additional_params["drum_pitch_range"])
-        ]
-        vocab[0] += ["Bar_None"]  # new bar token
+        vocab[0].extend(map("Pitch_{}".format, range(*self.config.pitch_range)))
+        vocab[0].extend(
+            map(
+                "DrumPitch_{}".format,
+                range(*self.config.additional_params["drum_pitch_range"]),
+            )
+        )
+        vocab[0].append("Bar_None")  # new bar token
         max_num_beats = max(ts[0] for ts in self.time_signatures)
         num_positions = max(self.config.beat_res.values()) * max_num_beats
-        vocab[0] += [f"Position_{i}" for i in range(num_positions)]
-        vocab[0] += [f"Program_{program}" for program in self.config.programs]
+        vocab[0].extend(map("Position_{}".format, range(num_positions)))
+        vocab[0].extend(map("Program_{}".format, self.config.programs))
 
         # BAR POS ENC
-        vocab[1] += [
-            f"BarPosEnc_{i}"
-            for i in range(self.config.additional_params["max_bar_embedding"])
-        ]
+        vocab[1].extend(
+            map(
+                "BarPosEnc_{}".format,
+                range(self.config.additional_params["max_bar_embedding"]),
+            )
+        )
 
         # POSITION POS ENC
-        vocab[2] += [
+        vocab[2].append(
             "PositionPosEnc_None"
-        ]  # special embedding used with 'Bar_None' tokens
-        vocab[2] += [f"PositionPosEnc_{i}" for i in range(num_positions)]  # pos enc
+        )  # special embedding used with 'Bar_None' tokens
+        vocab[2].extend(map("PositionPosEnc_{}".format, range(num_positions)))
 
         # CHORD
         if self.config.use_chords:
@@ -405,15 +481,15 @@ class MuMIDI(MIDITokenizer):
 
         # REST
         if self.config.use_rests:
-            vocab[0] += [f'Rest_{".".join(map(str, rest))}' for rest in self.rests]
+            vocab[0].extend(f'Rest_{".".join(map(str, rest))}' for rest in self.rests)
 
         # TEMPO
         if self.config.use_tempos:
-            vocab.append([f"Tempo_{i}" for i in self.tempos])
+            vocab.append(list(map("Tempo_{}".format, self.tempos)))
 
         # Velocity and Duration in last position
         # VELOCITY
-        vocab.append([f"Velocity_{i}" for i in self.velocities])
+        vocab.append(list(map("Velocity_{}".format, self.velocities)))
 
         # DURATION
         vocab.append(
@@ -461,7 +537,16 @@ class MuMIDI(MIDITokenizer):
         """
         err = 0
         previous_type = tokens[0][0].split("_")[0]
-        current_pitches = []
+        # Bind the attributes used at each iteration to locals
+        if self._frozen_types_graph is None:
+            self._frozen_types_graph = {
+                type_: frozenset(succ)
+                for type_, succ in self.tokens_types_graph.items()
+            }
+        tokens_types_graph = self._frozen_types_graph
+        remove_duplicated_notes = self.config.remove_duplicated_notes
+        bad_prefixes = ("PAD_", "MASK_")
+        current_pitches = 0  # bitset of the pitches at the current position
         current_bar = int(tokens[0][1].split("_")[1])
         current_pos = tokens[0][2].split("_")[1]
         current_pos = int(current_pos) if current_pos != "None" else -1
@@ -472,29 +557,31 @@ class MuMIDI(MIDITokenizer):
             pos_value = int(pos_value) if pos_value != "None" else -1
             token_type, token_value = token[0].split("_")
 
-            if any(tok.split("_")[0] in ["PAD", "MASK"] for i, tok in enumerate(token)):
+            if any(tok.startswith(bad_prefixes) for tok in token):
                 err += 1
                 continue
 
-            # Good token type
-            if token_type in self.tokens_types_graph[previous_type]:
-                if token_type == "Bar":
-                    current_bar += 1
-                    current_pos = -1
-                    current_pitches = []
-                elif self.config.remove_duplicated_notes and token_type == "Pitch":
-                    if int(token_value) in current_pitches:
+            # Good token type, most frequent types checked first
+            if token_type in tokens_types_graph.get(previous_type, ()):
+                if remove_duplicated_notes and token_type == "Pitch":
+                    pitch_bit = 1 << int(token_value)
+                    if current_pitches & pitch_bit:
                         err += 1  # pitch already played at current position
                     else:
-                        current_pitches.append(int(token_value))
+                        current_pitches |= pitch_bit
                 elif token_type == "Position":
-                    if int(token_value) <= current_pos or int(token_value) != pos_value:
+                    token_pos = int(token_value)
+                    if token_pos <= current_pos or token_pos != pos_value:
                         err += 1  # token position value <= to the current position
                     else:
-                        current_pos = int(token_value)
-                        current_pitches = []
+                        current_pos = token_pos
+                        current_pitches = 0
                 elif token_type == "Program":
-                    current_pitches = []
+                    current_pitches = 0
+                elif token_type == "Bar":
+                    current_bar += 1
+                    current_pos = -1
+                    current_pitches = 0
 
                 if pos_value < current_pos or bar_value < current_bar:
                     err += 1
@@ -6,6 +6,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 from symusic import Score
 from tqdm import tqdm
 
@@ -13,7 +14,7 @@ from miditok.data_augmentation import (
     augment_midi_dataset,
 )
 
-from .utils import HERE
+from .utils import HERE, _iter_mid_files
 
 
 def test_augment_midi_dataset(
@@ -35,7 +36,7 @@ def test_augment_midi_dataset(
         out_path=midi_aug_path,
     )
 
-    aug_midi_paths = list(midi_aug_path.glob("**/*.mid"))
+    aug_midi_paths = list(_iter_mid_files(midi_aug_path))
     for aug_midi_path in tqdm(
         aug_midi_paths, desc="CHECKING DATA AUGMENTATION ON MIDIS"
     ):
@@ -62,33 +63,41 @@ def test_augment_midi_dataset(
                 continue
             track_ogi.notes.sort(key=lambda x: (x.start, x.pitch, x.end, x.velocity))
             track_aug.notes.sort(key=lambda x: (x.start, x.pitch, x.end, x.velocity))
-            for note_o, note_a in zip(track_ogi.notes, track_aug.notes):
-                if note_a.pitch != note_o.pitch + offsets[0]:
-                    raise ValueError(
-                        f"Pitch assertion failed: expected "
-                        f"{note_o.pitch + offsets[0]}, got {note_a.pitch}"
-                    )
-                if offsets[2] < 0:
-                    dur_exp = max(
-                        note_o.duration + offsets[2],
-                        min(min_duration_ticks, note_o.duration),
-                    )
-                elif offsets[2] > 0:
-                    dur_exp = note_o.duration + offsets[2]
-                else:
-                    dur_exp = note_o.duration
-                if note_a.duration != dur_exp:
-                    raise ValueError(
-                        f"Duration assertion failed: expected "
-                        f"{dur_exp}, got {note_a.duration}"
-                    )
+            notes_ogi = track_ogi.notes.numpy()
+            notes_aug = track_aug.notes.numpy()
+            pitches_exp = notes_ogi["pitch"].astype(np.int32) + offsets[0]
+            if not np.array_equal(notes_aug["pitch"], pitches_exp):
+                raise ValueError(
+                    f"Pitch assertion failed: expected "
+                    f"{pitches_exp}, got {notes_aug['pitch']}"
+                )
+            durations_ogi = notes_ogi["duration"]
+            if offsets[2] < 0:
+                durations_exp = np.maximum(
+                    durations_ogi + offsets[2],
+                    np.minimum(min_duration_ticks, durations_ogi),
+                )
+            else:
+                durations_exp = durations_ogi + offsets[2]
+            if not np.array_equal(notes_aug["duration"], durations_exp):
+                raise ValueError(
+                    f"Duration assertion failed: expected "
+                    f"{durations_exp}, got {notes_aug['duration']}"
+                )
             # We need to resort the tracks with the velocity key in third position
             # before checking their values.
             track_ogi.notes.sort(key=lambda x: (x.start, x.pitch, x.velocity))
             track_aug.notes.sort(key=lambda x: (x.start, x.pitch, x.velocity))
-            for note_o, note_a in zip(track_ogi.notes, track_aug.notes):
-                if note_a.velocity not in [1, 127, note_o.velocity + offsets[1]]:
-                    raise ValueError(
-                        f"Velocity assertion failed: expected one in "
-                        f"{[1, 127, note_o.velocity + offsets[1]]}, got {note_a.pitch}"
-                    )
+            velocities_aug = track_aug.notes.numpy()["velocity"].astype(np.int32)
+            velocities_exp = (
+                track_ogi.notes.numpy()["velocity"].astype(np.int32) + offsets[1]
+            )
+            if not np.all(
+                (velocities_aug == velocities_exp)
+                | (velocities_aug == 1)
+                | (velocities_aug == 127)
+            ):
+                raise ValueError(
+                    f"Velocity assertion failed: expected "
+                    f"{velocities_exp} (or 1 / 127), got {velocities_aug}"
+                )
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from copy import copy, deepcopy
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
+import numpy as np
 from symusic import (
     Note,
     Pedal,
@@ -15,7 +16,12 @@ from symusic import (
     TimeSignature,
     Track,
 )
-from symusic.core import TempoTickList
+from symusic.core import (
+    PedalTickList,
+    PitchBendTickList,
+    TempoTickList,
+    TimeSignatureTickList,
+)
 
 import miditok
 from miditok.constants import CHORD_MAPS, TIME_SIGNATURE, TIME_SIGNATURE_RANGE
@@ -23,20 +29,37 @@ from miditok.constants import CHORD_MAPS, TIME_SIGNATURE, TIME_SIGNATURE_RANGE
 SEED = 777
 
 HERE = Path(__file__).parent
-MIDI_PATHS_ONE_TRACK = sorted((HERE / "MIDIs_one_track").rglob("*.mid"))
-MIDI_PATHS_MULTITRACK = sorted((HERE / "MIDIs_multitrack").rglob("*.mid"))
-MIDI_PATHS_ALL = sorted(
-    deepcopy(MIDI_PATHS_ONE_TRACK) + deepcopy(MIDI_PATHS_MULTITRACK)
-)
+
+
+def _iter_mid_files(path: Path | str) -> Iterator[Path]:
+    """Recursively yields the MIDI file paths within a directory.
+
+    Faster than ``Path.glob("**/*.mid")`` as ``os.scandir`` entries carry
+    their file type, avoiding an extra stat call per file.
+    """
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            yield from _iter_mid_files(entry.path)
+        elif entry.name.endswith(".mid"):
+            yield Path(entry.path)
+
+
+# These lists are consumed at collection time by ``pytest.mark.parametrize``
+# across the test modules, so they cannot be turned into session fixtures
+MIDI_PATHS_ONE_TRACK = sorted(_iter_mid_files(HERE / "MIDIs_one_track"))
+MIDI_PATHS_MULTITRACK = sorted(_iter_mid_files(HERE / "MIDIs_multitrack"))
+MIDI_PATHS_ALL = sorted(MIDI_PATHS_ONE_TRACK + MIDI_PATHS_MULTITRACK)
 TEST_LOG_DIR = HERE / "test_logs"
 # MIDI files known to contain tricky contents (time sig, pedals...) and edge case
 # situations, likely to make some tests fail.
-MIDIS_ONE_TRACK_HARD_NAMES = [
-    "6338816_Etude No. 4.mid",
-    "6354774_Macabre Waltz.mid",
-    "Maestro_9.mid",
-    "POP909_191.mid",
-]
+MIDIS_ONE_TRACK_HARD_NAMES = frozenset(
+    {
+        "6338816_Etude No. 4.mid",
+        "6354774_Macabre Waltz.mid",
+        "Maestro_9.mid",
+        "POP909_191.mid",
+    }
+)
 MIDI_PATHS_ONE_TRACK_HARD = [
     path for path in MIDI_PATHS_ONE_TRACK if path.name in MIDIS_ONE_TRACK_HARD_NAMES
 ]
@@ -46,7 +69,11 @@ ALL_TOKENIZATIONS = miditok.tokenizations.__all__
 TOKENIZATIONS_BPE = ["REMI", "MIDILike", "TSD", "MMM", "Structured"]
 
 # TOK CONFIG PARAMS
-TIME_SIGNATURE_RANGE_TESTS = TIME_SIGNATURE_RANGE
+# Copy the constant (including its lists) so that the tests-specific entries
+# below do not leak into miditok.constants.TIME_SIGNATURE_RANGE
+TIME_SIGNATURE_RANGE_TESTS = {
+    denom: list(beats) for denom, beats in TIME_SIGNATURE_RANGE.items()
+}
 TIME_SIGNATURE_RANGE_TESTS.update({2: [2, 3, 4]})
 TIME_SIGNATURE_RANGE_TESTS[4].append(8)
 TOKENIZER_CONFIG_KWARGS = {
@@ -64,6 +91,18 @@ TOKENIZER_CONFIG_KWARGS = {
 }
 
 
+# Parameter patches per tokenization, built once so that each call of
+# ``adjust_tok_params_for_tests`` is a dict lookup + update.
+_TOK_PARAM_PATCHES = {
+    # Increase the TimeShift voc for Structured as it doesn't support successive
+    # TimeShifts.
+    "Structured": {"beat_res": {(0, 512): 8}},
+    # We don't test time signatures with Octuple as it can lead to time shifts, as the
+    # TS changes are only carried at the onset times of the notes.
+    "Octuple": {"max_bar_embedding": 300, "use_time_signatures": False},
+}
+
+
 def adjust_tok_params_for_tests(tokenization: str, params: dict[str, Any]) -> None:
     """Adjusts parameters (as dictionary for keyword arguments) depending on the
     tokenization.
@@ -71,15 +110,9 @@ def adjust_tok_params_for_tests(tokenization: str, params: dict[str, Any]) -> No
     :param tokenization: tokenization.
     :param params: parameters as a dictionary of keyword arguments.
     """
-    # Increase the TimeShift voc for Structured as it doesn't support successive
-    # TimeShifts.
-    if tokenization == "Structured":
-        params["beat_res"] = {(0, 512): 8}
-    # We don't test time signatures with Octuple as it can lead to time shifts, as the
-    # TS changes are only carried at the onset times of the notes.
-    elif tokenization == "Octuple":
-        params["max_bar_embedding"] = 300
-        params["use_time_signatures"] = False
+    patch = _TOK_PARAM_PATCHES.get(tokenization)
+    if patch:
+        params.update(patch)
     # Rests and time sig can mess up with CPWord, when a Rest that is crossing new bar
     # is followed by a new TimeSig change, as TimeSig are carried with Bar tokens (and
     # there is None is this case).
@@ -100,7 +133,17 @@ def sort_midi(midi: Score, sort_tracks: bool = True) -> None:
     for track in midi.tracks:
         if track.is_drum:
             track.program = 0  # need to be done before sorting tracks per program
-        track.notes.sort(key=lambda x: (x.time, x.pitch, x.duration, x.velocity))
+        # Sort the notes from their numpy attribute views, sparing the
+        # per-comparison Python key callback and tuple build of .sort(key=...)
+        notes = track.notes
+        arrays = notes.numpy()
+        order = np.lexsort(
+            (arrays["velocity"], arrays["duration"], arrays["pitch"], arrays["time"])
+        )
+        # Decoded MIDIs are usually already in order: only rebuild the list
+        # when the computed order is not the identity
+        if not np.all(order[1:] > order[:-1]):
+            track.notes = [notes[int(idx)] for idx in order]
         # track.pedals.sort()
         # track.pitch_bends.sort()
         # track.controls.sort()
@@ -113,29 +156,32 @@ def sort_midi(midi: Score, sort_tracks: bool = True) -> None:
 
 
 def adapt_ref_midi_before_tokenize(
-    midi: Score, tokenizer: miditok.MIDITokenizer
+    midi: Score, tokenizer: miditok.MIDITokenizer, tokenization: str | None = None
 ) -> None:
     """Adapt (inplace) the contents of a MIDI before it is tokenized.
 
     :param midi: MIDI object to adapt.
     :param tokenizer: tokenizer being used.
+    :param tokenization: name of the tokenizer's class, to avoid fetching it again.
     """
-    tokenization = type(tokenizer).__name__ if tokenizer is not None else None
+    if tokenization is None:
+        tokenization = type(tokenizer).__name__ if tokenizer is not None else None
+    config = tokenizer.config
 
     if tokenizer._note_on_off:
         # Need to sort the notes with all these keys, as otherwise some velocity values
         # might be mixed up for notes with the same onset and duration values as the
         # tokens are decoded in a FIFO logic.
         # But before sorting, we need to merge the tracks if needed, and clip durations
-        if tokenizer.config.use_programs and tokenizer.one_token_stream:
+        if config.use_programs and tokenizer.one_token_stream:
             miditok.utils.merge_same_program_tracks(midi.tracks)
 
         # If a max_duration is provided, we clip the durations of the notes before
         # tokenizing, otherwise these notes will be tokenized with durations > to this
         # limit, which would yield errors when checking TSE.
-        if "max_duration" in tokenizer.config.additional_params:
+        if "max_duration" in config.additional_params:
             max_duration = tokenizer._token_duration_to_ticks(
-                tokenizer.config.additional_params["max_duration"],
+                config.additional_params["max_duration"],
                 midi.ticks_per_quarter,
             )
             for track in midi.tracks:
@@ -148,7 +194,7 @@ def adapt_ref_midi_before_tokenize(
     # If a MIDI doesn't have any note, no time signature will be tokenized, and in turn
     # decoded. If that's the case, we simply set time signatures to the default one.
     if (
-        tokenizer.config.use_time_signatures
+        config.use_time_signatures
         and tokenization in ["Octuple", "CPWord", "MMM"]
         and (len(midi.tracks) == 0 or len(midi.tracks[0].notes) == 0)
     ):
@@ -156,7 +202,7 @@ def adapt_ref_midi_before_tokenize(
 
 
 def adapt_ref_midi_for_tests_assertion(
-    midi: Score, tokenizer: miditok.MIDITokenizer
+    midi: Score, tokenizer: miditok.MIDITokenizer, tokenization: str | None = None
 ) -> Score:
     """Adapt the reference tokenized MIDI so that its contents fit what is expected to
     be retrieved when decoding the tokens.
@@ -165,14 +211,29 @@ def adapt_ref_midi_for_tests_assertion(
 
     :param midi: midi reference.
     :param tokenizer: in order to downsample the MIDI before sorting its content.
+    :param tokenization: name of the tokenizer's class, to avoid fetching it again.
     :return: a new MIDI object with track (and notes) sorted.
     """
-    tokenization = type(tokenizer).__name__ if tokenizer is not None else None
-    new_midi = copy(midi)
+    if tokenization is None:
+        tokenization = type(tokenizer).__name__ if tokenizer is not None else None
+    config = tokenizer.config
+    # Only the time signatures and tracks are mutated before ``preprocess_midi``,
+    # which itself returns a new (resampled) Score, so a targeted shallow clone
+    # is enough and avoids a full copy of the MIDI
+    new_midi = Score(midi.ticks_per_quarter)
+    new_midi.tracks = midi.tracks
+    new_midi.tempos = midi.tempos
+    new_midi.time_signatures = list(midi.time_signatures)
 
     # merging is performed in preprocess only in one_token_stream mode
     # but in multi token stream, decoding will actually keep one track per program
-    if tokenizer.config.use_programs and tokenizer.one_token_stream:
+    # For NoteOn/NoteOff tokenizers, adapt_ref_midi_before_tokenize already merged
+    # the tracks, so there is nothing left to merge here
+    if (
+        config.use_programs
+        and tokenizer.one_token_stream
+        and not tokenizer._note_on_off
+    ):
         miditok.utils.merge_same_program_tracks(new_midi.tracks)
 
     # We delete time sigs outside of those covered by the tokenizer.
@@ -187,7 +248,7 @@ def adapt_ref_midi_for_tests_assertion(
     # For Octuple, as tempo is only carried at notes times, we need to adapt
     # their times for comparison. Set tempo changes at onset times of notes.
     # We use the first track only, as it is the one for which tempos are decoded
-    if tokenizer.config.use_tempos and tokenization in ["Octuple"]:
+    if config.use_tempos and tokenization in ["Octuple"]:
         if len(new_midi.tracks) > 0:
             adapt_tempo_changes_times(
                 new_midi.tracks if tokenizer.one_token_stream else new_midi.tracks[:1],
@@ -210,6 +271,12 @@ def midis_notes_equals(
     :param midi2: second MIDI.
     :return: list of errors.
     """
+    if len(midi1.tracks) != len(midi2.tracks):
+        # Decoding a MIDI without notes can yield an empty default track, which
+        # is not considered an error
+        if any(len(track.notes) > 0 for track in (*midi1.tracks, *midi2.tracks)):
+            return [(-1, "nb_tracks", [("len", len(midi2.tracks), len(midi1.tracks))])]
+        return []
     errors = []
     for track1, track2 in zip(midi1.tracks, midi2.tracks):
         track_errors = tracks_notes_equals(track1, track2)
@@ -223,6 +290,14 @@ def tracks_notes_equals(
 ) -> list[tuple[str, Note | int, int]]:
     if len(track1.notes) != len(track2.notes):
         return [("len", len(track2.notes), len(track1.notes))]
+    # Fast path: compare the contiguous attribute arrays at once, and only fall
+    # back to the per-note loop to build the error list on a mismatch
+    notes1, notes2 = track1.notes.numpy(), track2.notes.numpy()
+    if all(
+        np.array_equal(notes1[key], notes2[key])
+        for key in ("time", "duration", "pitch", "velocity")
+    ):
+        return []
     errors = []
     for note1, note2 in zip(track1.notes, track2.notes):
         err = notes_equals(note1, note2)
@@ -232,26 +307,68 @@ def tracks_notes_equals(
 
 
 def notes_equals(note1: Note, note2: Note) -> str:
-    if note1.start != note2.start:
-        return "start"
-    elif note1.end != note2.end:
-        return "end"
-    elif note1.pitch != note2.pitch:
-        return "pitch"
-    elif note1.velocity != note2.velocity:
-        return "velocity"
+    # A single tuple comparison early-exits the common case (equal notes),
+    # the attribute walk only runs to name the first differing field
+    attrs1 = (note1.start, note1.end, note1.pitch, note1.velocity)
+    attrs2 = (note2.start, note2.end, note2.pitch, note2.velocity)
+    if attrs1 == attrs2:
+        return ""
+    names = ("start", "end", "pitch", "velocity")
+    for name, attr1, attr2 in zip(names, attrs1, attrs2):
+        if attr1 != attr2:
+            return name
     return ""
 
 
+def _events_equal(
+    list1: PedalTickList | PitchBendTickList | TimeSignatureTickList,
+    list2: PedalTickList | PitchBendTickList | TimeSignatureTickList,
+    keys: tuple[str, ...],
+) -> bool:
+    """Compare two symusic event lists from their numpy attribute views.
+
+    Comparing the lists directly (``list1 != list2``) deep-compares every event
+    object, whereas ``np.array_equal`` on the attribute arrays covers the same
+    contents in a few vectorized passes. Falls back to ``==`` for list types
+    without a ``numpy`` method.
+
+    :param list1: first event list.
+    :param list2: second event list.
+    :param keys: attribute keys to compare.
+    :return: whether the two lists hold the same events.
+    """
+    try:
+        arrays1, arrays2 = list1.numpy(), list2.numpy()
+    except AttributeError:
+        return list1 == list2
+    return all(np.array_equal(arrays1[key], arrays2[key]) for key in keys)
+
+
 def tempos_equals(tempos1: TempoTickList, tempos2: TempoTickList) -> bool:
-    for tempo1, tempo2 in zip(tempos1, tempos2):
-        if (
-            tempo1.time != tempo2.time
-            or round(tempo1.qpm, 2) != round(tempo2.qpm, 2)
-            or abs(tempo1.mspq - tempo2.mspq) > 1
-        ):
-            return False
-    return True
+    if len(tempos1) != len(tempos2):
+        return False
+    try:
+        arrays1, arrays2 = tempos1.numpy(), tempos2.numpy()
+    except AttributeError:
+        for tempo1, tempo2 in zip(tempos1, tempos2):
+            if (
+                tempo1.time != tempo2.time
+                or round(tempo1.qpm, 2) != round(tempo2.qpm, 2)
+                or abs(tempo1.mspq - tempo2.mspq) > 1
+            ):
+                return False
+        return True
+    if not np.array_equal(arrays1["time"], arrays2["time"]):
+        return False
+    mspq1 = arrays1["mspq"].astype(np.int64)
+    mspq2 = arrays2["mspq"].astype(np.int64)
+    if np.any(np.abs(mspq1 - mspq2) > 1):
+        return False
+    # qpm is derived from mspq (60e6 / mspq), compare its rounded values as the
+    # Python loop above does on the per-tempo attributes
+    return np.array_equal(
+        np.round(60_000_000 / mspq1, 2), np.round(60_000_000 / mspq2, 2)
+    )
 
 
 def check_midis_equals(
@@ -283,19 +400,36 @@ def check_midis_equals(
         num_errors = sum(len(t[2]) for t in errors)
         print(f"{log_prefix} failed to encode/decode NOTES ({num_errors} errors)")
 
-    # Check pedals
-    if check_pedals:
-        for inst1, inst2 in zip(midi1.tracks, midi2.tracks):
-            if inst1.pedals != inst2.pedals:
-                types_of_errors.append("PEDALS")
-                break
+    # Pedal and pitch bend checks are only relevant when the track sets match,
+    # which the notes check above already reports otherwise
+    same_num_tracks = len(midi1.tracks) == len(midi2.tracks)
 
-    # Check pitch bends
-    if check_pitch_bends:
+    # Check pedals and pitch bends in a single walk over the track pairs
+    if (check_pedals or check_pitch_bends) and same_num_tracks:
+        pedals_bad = pitch_bends_bad = False
         for inst1, inst2 in zip(midi1.tracks, midi2.tracks):
-            if inst1.pitch_bends != inst2.pitch_bends:
-                types_of_errors.append("PITCH BENDS")
+            if (
+                check_pedals
+                and not pedals_bad
+                and not _events_equal(inst1.pedals, inst2.pedals, ("time", "duration"))
+            ):
+                pedals_bad = True
+            if (
+                check_pitch_bends
+                and not pitch_bends_bad
+                and not _events_equal(
+                    inst1.pitch_bends, inst2.pitch_bends, ("time", "value")
+                )
+            ):
+                pitch_bends_bad = True
+            if (pedals_bad or not check_pedals) and (
+                pitch_bends_bad or not check_pitch_bends
+            ):
                 break
+        if pedals_bad:
+            types_of_errors.append("PEDALS")
+        if pitch_bends_bad:
+            types_of_errors.append("PITCH BENDS")
 
     """# Check control changes
     if check_control_changes:
@@ -309,7 +443,11 @@ def check_midis_equals(
         types_of_errors.append("TEMPOS")
 
     # Checks time signatures
-    if check_time_signatures and midi1.time_signatures != midi2.time_signatures:
+    if check_time_signatures and not _events_equal(
+        midi1.time_signatures,
+        midi2.time_signatures,
+        ("time", "numerator", "denominator"),
+    ):
         types_of_errors.append("TIME SIGNATURES")
 
     # Prints types of errors
@@ -326,18 +464,27 @@ def tokenize_and_check_equals(
     file_name: str,
 ) -> tuple[Score, Score, bool]:
     tokenization = type(tokenizer).__name__
+    config = tokenizer.config
     log_prefix = f"{file_name} / {tokenization}"
 
     # Tokenize and detokenize
-    adapt_ref_midi_before_tokenize(midi, tokenizer)
+    adapt_ref_midi_before_tokenize(midi, tokenizer, tokenization)
     tokens = tokenizer(midi)
     midi_decoded = tokenizer(
         tokens,
         miditok.utils.get_midi_programs(midi) if len(midi.tracks) > 0 else None,
     )
 
+    # Checks types and values conformity following the rules, now so that the
+    # token sequences can be released before the MIDI comparisons below,
+    # lowering the peak memory held for long MIDIs
+    err_tse = tokenizer.tokens_errors(tokens)
+    if isinstance(err_tse, list):
+        err_tse = sum(err_tse)
+    del tokens
+
     # Post-process the reference and decoded MIDIs
-    midi = adapt_ref_midi_for_tests_assertion(midi, tokenizer)
+    midi = adapt_ref_midi_for_tests_assertion(midi, tokenizer, tokenization)
     sort_midi(midi)
     sort_midi(midi_decoded)
 
@@ -345,17 +492,13 @@ def tokenize_and_check_equals(
     midi_equals = check_midis_equals(
         midi,
         midi_decoded,
-        check_tempos=tokenizer.config.use_tempos and tokenization != "MuMIDI",
-        check_time_signatures=tokenizer.config.use_time_signatures,
-        check_pedals=tokenizer.config.use_sustain_pedals,
-        check_pitch_bends=tokenizer.config.use_pitch_bends,
+        check_tempos=config.use_tempos and tokenization != "MuMIDI",
+        check_time_signatures=config.use_time_signatures,
+        check_pedals=config.use_sustain_pedals,
+        check_pitch_bends=config.use_pitch_bends,
         log_prefix=log_prefix,
     )
 
-    # Checks types and values conformity following the rules
-    err_tse = tokenizer.tokens_errors(tokens)
-    if isinstance(err_tse, list):
-        err_tse = sum(err_tse)
     if err_tse != 0.0:
         midi_equals = False
         print(f"{log_prefix} Validation of tokens types / values successions failed")
@@ -374,15 +517,15 @@ def del_invalid_time_sig(
     :param time_sigs: time signatures to filter
     :param time_sigs_tokenizer:
     """
-    idx = 0
-    while idx < len(time_sigs):
-        if (
-            time_sigs[idx].numerator,
-            time_sigs[idx].denominator,
-        ) not in time_sigs_tokenizer:
-            del time_sigs[idx]
-        else:
-            idx += 1
+    valid = set(time_sigs_tokenizer)
+    kept = [
+        time_sig
+        for time_sig in time_sigs
+        if (time_sig.numerator, time_sig.denominator) in valid
+    ]
+    if len(kept) != len(time_sigs):
+        time_sigs.clear()
+        time_sigs.extend(kept)
 
 
 def adapt_tempo_changes_times(
@@ -399,9 +542,12 @@ def adapt_tempo_changes_times(
     :param tempo_changes: tempo changes to adapt
     :param default_tempo: default tempo value to mock at beginning if needed
     """
-    times = []
-    for track in tracks:
-        times += [note.time for note in track.notes]
+    times_arrays = [
+        track.notes.numpy()["time"] for track in tracks if len(track.notes) > 0
+    ]
+    if not times_arrays:
+        return
+    times = np.concatenate(times_arrays)
     times.sort()
 
     # Fixes the first tempo at the time of the first note and mock if needed
@@ -414,28 +560,31 @@ def adapt_tempo_changes_times(
     if tempo_changes[0].time != 0:
         tempo_changes.insert(0, Tempo(0, default_tempo))
 
-    time_idx = tempo_idx = 0
-    while tempo_idx < len(tempo_changes):
-        # Delete tempos after the last note
-        if tempo_changes[tempo_idx].time > times[-1]:
-            del tempo_changes[tempo_idx]
+    # Single forward merge pass: the first tempo (at 0) is always kept, the
+    # time pointer only advances and never rescans the note times
+    out = [tempo_changes[0]]
+    time_idx = 0
+    last_time = int(times[-1])
+    for tempo_idx in range(1, len(tempo_changes)):
+        tempo_change = tempo_changes[tempo_idx]
+        # Skip tempos after the last note
+        if tempo_change.time > last_time:
             continue
-        # Loop over incoming notes to adapt times
-        # Except for the first one which is at 0
-        if tempo_idx > 0:
-            for n, time in enumerate(times[time_idx:]):
-                if time >= tempo_changes[tempo_idx].time:
-                    tempo_changes[tempo_idx].time = time
-                    time_idx += n
-                    break
-        # Delete successive tempos at the same position (keep the latest)
-        if (
-            tempo_idx > 0
-            and tempo_changes[tempo_idx].time == tempo_changes[tempo_idx - 1].time
-        ):
-            del tempo_changes[tempo_idx - 1]
-            continue
-        tempo_idx += 1
+        # Adapt the time to the first note time >= to the tempo's time
+        while times[time_idx] < tempo_change.time:
+            time_idx += 1
+        tempo_change.time = int(times[time_idx])
+        # Successive tempos at the same position: keep the latest
+        if tempo_change.time == out[-1].time:
+            out[-1] = tempo_change
+        else:
+            out.append(tempo_change)
+    if len(out) != len(tempo_changes):
+        # Copies must be taken before clearing, as the elements above are
+        # references into the symusic list
+        out = [tempo_change.copy() for tempo_change in out]
+        tempo_changes.clear()
+        tempo_changes.extend(out)
 
 
 def clip_durations(
@@ -448,6 +597,14 @@ def clip_durations(
     :param notes_pedals: list of Note or Pedal objects to adapt.
     :param max_duration: max_duration in ticks
     """
-    for note_pedal in notes_pedals:
-        if note_pedal.duration > max_duration:
-            note_pedal.duration = max_duration
+    # Find the offending indices from the numpy view, so only the (usually
+    # few) objects to clip are touched at Python level
+    try:
+        durations = notes_pedals.numpy()["duration"]
+    except AttributeError:  # plain Python list
+        for note_pedal in notes_pedals:
+            if note_pedal.duration > max_duration:
+                note_pedal.duration = max_duration
+        return
+    for idx in np.flatnonzero(durations > max_duration):
+        notes_pedals[int(idx)].duration = max_duration